@@ -2,18 +2,48 @@ import sys
 import os
 import json
 import asyncio
-import threading
 import time
+import functools
 import re
-import matplotlib.pyplot as plt
+import zipfile
+from array import array
+from collections import OrderedDict
+import numpy as np
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QCheckBox,
-    QFileDialog, QHBoxLayout, QScrollArea, QMessageBox, QGraphicsDropShadowEffect,
+    QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QListView,
+    QFileDialog, QHBoxLayout, QMessageBox, QGraphicsDropShadowEffect,
     QProgressBar, QComboBox, QSpinBox, QGroupBox, QFormLayout, QLineEdit
 )
 from PyQt5.QtGui import QFont, QIcon, QPixmap, QPalette, QBrush, QColor
-from PyQt5.QtCore import Qt, pyqtSignal, QObject, QThread
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, QAbstractListModel, QModelIndex
 from bleak import BleakScanner, BleakClient
+import qasync
+
+# orjson is optional; fall back to the standard library json module
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    json_loads = json.loads
+
+# ijson is optional; without it large files are parsed in one go as well
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# numba is optional; without it M4 downsampling runs as NumPy reductions
+try:
+    import numba
+    from numba import njit, prange
+    # compile_m4_kernel compiles on a worker thread, which with the TBB threading
+    # layer leaves the interpreter hanging at exit; the kernel itself only ever
+    # runs on the UI thread, so Numba's own thread pool is enough
+    if "NUMBA_THREADING_LAYER" not in os.environ:
+        numba.config.THREADING_LAYER = "workqueue"
+except ImportError:
+    njit = None
 
 
 # Constants for BLE communication
@@ -21,182 +51,684 @@ BLE_DEVICE_NAME = "ESP32-BLE-Sender"
 BLE_SERVICE_UUID = "0000FFE0-0000-1000-8000-00805F9B34FB"
 BLE_CHARACTERISTIC_UUID = "0000FFE1-0000-1000-8000-00805F9B34FB"
 
+# Largest transmission accepted from the device; bigger ones are dropped
+RX_BUFFER_SIZE = 64 * 1024
+
+# Silence (seconds) after the last packet that ends a transmission
+RX_CHUNK_TIMEOUT = 1.0
+
+# Address of the last connected device, so later sessions can skip the scan
+BLE_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "ecse398", "ble.json")
+
+# Measurements come from a 12-bit ADC, so float32 is plenty; timestamps are
+# epoch seconds and need float64 to keep sub-second resolution
+SAMPLE_DTYPE = np.float32
+TIME_DTYPE = np.float64
+
+# Number of parsed data files kept in memory for instant reloads
+JSON_CACHE_SIZE = 4
+
+# Data files larger than this are streamed with ijson instead of parsed whole
+STREAM_LOAD_MIN_BYTES = 50 * 1024 * 1024
+
+# Data files at least this large get a binary .npz copy next to them, which is
+# loaded instead of re-parsing the JSON as long as it is newer than the file
+SIDECAR_MIN_BYTES = 1024 * 1024
+SIDECAR_SUFFIX = ".npz"
+
+# Longest series that is still plotted with a marker on every point
+PLOT_MARKER_MAX_POINTS = 50
+
+# Any run of whitespace and commas between values in a BLE payload
+SEPARATOR_RE = re.compile(r'[\s,]+')
+
+# Kinds of measurement, matched by substring of the data key (in priority order),
+# with the display format for their latest value and their plot axis label
+VALUE_FORMATS = {
+    "voltage": "{key}: {v:.2f} V\n",
+    "current": "{key}: {v:.2f} A\n",
+    "power": "{key}: {v:.2f} W\n",
+    "life": "{key}: {v:.1f}%\n",
+}
+DEFAULT_VALUE_FORMAT = "{key}: {v}\n"
+AXIS_LABELS = {
+    "voltage": "Voltage (V)",
+    "current": "Current (A)",
+    "power": "Power (W)",
+    "life": "Battery Life (%)",
+}
+
+
+@functools.lru_cache(maxsize=32)
+def encode_command(battery_num, measurement_type, measurement_count):
+    """Encode a request for the BLE device (requests are usually repeated, so cache them)"""
+    return f"{battery_num};{measurement_type};{measurement_count}".encode()
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def m4_slices(values, bounds, picks):
+        """Fill picks[c] with the first, min, max and last index of values[bounds[c]:bounds[c + 1]]"""
+        for c in prange(len(bounds) - 1):
+            start = bounds[c]
+            end = bounds[c + 1]
+            lo = hi = -1
+            for i in range(start, end):
+                v = values[i]
+                if v != v:
+                    continue  # NaN is skipped, as np.fmin/np.fmax do
+                if lo < 0:
+                    lo = hi = i
+                elif v < values[lo]:
+                    lo = i
+                elif v > values[hi]:
+                    hi = i
+            if lo < 0:
+                lo = hi = start  # All NaN: only the first and last sample are kept
+            picks[c, 0] = start
+            picks[c, 1] = lo
+            picks[c, 2] = hi
+            picks[c, 3] = end - 1
+
+
+def compile_m4_kernel():
+    """Compile m4_slices for float32 and float64 samples ahead of the first plot"""
+    # Compiling takes about a second per dtype, so it is done on a worker thread
+    # at startup rather than on the UI thread by the first long plot
+    if njit is not None:
+        for dtype in ("float32", "float64"):
+            m4_slices.compile(f"void({dtype}[::1], intp[::1], intp[:, ::1])")
+
+
+def m4_indices(values, columns):
+    """Indices of the first, last, min and max sample in each of `columns` slices (M4 downsampling)"""
+    n = len(values)
+    if n <= 4 * columns:
+        return np.arange(n)
+    # Equal-sized slices by sample index; merged files are not guaranteed to be time-sorted.
+    # Both paths below use these bounds and ignore NaN samples for the min and max.
+    bounds = np.arange(columns + 1, dtype=np.intp) * n // columns
+    if njit is not None:
+        # Compiled kernel: no temporaries, and the slices are scanned in parallel
+        picks = np.empty((columns, 4), dtype=np.intp)
+        m4_slices(values, bounds, picks)
+        return np.unique(picks)
+    
+    starts, sizes = bounds[:-1], np.diff(bounds)
+    slice_of = np.repeat(np.arange(columns), sizes)
+    picks = [starts, bounds[1:] - 1]
+    for reduce in (np.fmin, np.fmax):
+        extremes = reduce.reduceat(values, starts)
+        hits = np.flatnonzero(values == extremes[slice_of])
+        _, first = np.unique(slice_of[hits], return_index=True)
+        picks.append(hits[first])
+    return np.unique(np.concatenate(picks))
+
 
 # Custom signal emitter for Bluetooth events
 class BluetoothSignals(QObject):
     device_found = pyqtSignal(str)
     connection_status = pyqtSignal(bool, str)
     data_received = pyqtSignal(str)
-    chunks_complete = pyqtSignal(list)
+    chunks_complete = pyqtSignal(bytes)
 
 
-class BluetoothWorker(QThread):
-    def __init__(self, parent=None):
-        super().__init__(parent)
+class BluetoothWorker:
+    """Runs the BLE connection as asyncio tasks on the Qt event loop (via qasync)"""
+    def __init__(self):
         self.signals = BluetoothSignals()
         self.client = None
+        self.characteristic = BLE_CHARACTERISTIC_UUID
         self.device_name = BLE_DEVICE_NAME
         self.device_address = None
         self.is_scanning = True
         self.is_connected = False
         self.loop = None
-        self.received_chunks = []
+        self._tasks = set()
+        self._rx = bytearray(RX_BUFFER_SIZE)  # Preallocated receive buffer
+        self._rx_len = 0
+        self.chunk_count = 0  # Packets in the current transmission
         self.chunks_in_progress = False
+        self._chunk_event = asyncio.Event()
+        self._last_chunk_ts = 0.0
+        self._last_preview_emit = 0.0
+        self._transmission_start = 0
+        self._bracket_depth = 0
+        self._discarding = False  # Dropping the rest of an oversized transmission
         
-    def run(self):
-        """Main thread function that handles the asyncio event loop"""
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
-        self.loop.run_until_complete(self.scan_and_connect())
-        self.loop.run_forever()
+    def start(self):
+        """Start scanning on the current (Qt-integrated) event loop"""
+        self.loop = asyncio.get_event_loop()
+        self.device_address = self.load_cached_address()
+        self.spawn(self.supervisor())
 
-    async def scan_and_connect(self):
-        """Scan for BLE devices and connect to the target device"""
+    def stop(self):
+        """Cancel all running Bluetooth tasks"""
+        self.is_scanning = False
+        for task in list(self._tasks):
+            task.cancel()
+
+    def spawn(self, coro):
+        """Schedule a coroutine on the event loop and keep a reference to the task"""
+        task = self.loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def load_cached_address(self):
+        """Return the cached address of the target device, if any"""
+        try:
+            with open(BLE_CACHE_FILE, 'r') as f:
+                return json.load(f).get(self.device_name)
+        except (OSError, ValueError):
+            return None
+
+    def save_cached_address(self):
+        """Remember the address of the connected device for the next session"""
+        try:
+            os.makedirs(os.path.dirname(BLE_CACHE_FILE), exist_ok=True)
+            with open(BLE_CACHE_FILE, 'w') as f:
+                json.dump({self.device_name: self.device_address}, f)
+        except OSError as e:
+            print(f"Could not save BLE cache: {str(e)}")
+
+    def is_target_device(self, device, advertisement_data):
+        """Scanner filter matching the target device by name"""
+        name = advertisement_data.local_name or device.name
+        return bool(name) and self.device_name in name
+
+    async def supervisor(self):
+        """Scan, connect and monitor the device in turn until the worker is stopped"""
+        while True:
+            # Skip the scan if the address is already known (from the cache or a
+            # previous connection); a failed connection forgets it
+            if not self.device_address:
+                await self.scan_for_device()
+            
+            if await self.connect_to_device():
+                # Returns once the connection is lost
+                await self.connection_monitor()
+            else:
+                await asyncio.sleep(5)  # Wait before retrying
+    
+    async def scan_for_device(self):
+        """Scan until the target device is found and remember its address"""
+        self.is_scanning = True
         while self.is_scanning:
             try:
                 self.signals.connection_status.emit(False, "Scanning for BLE device...")
                 
-                # Scan for devices
-                devices = await BleakScanner.discover()
+                # Scan until the first matching advertisement is received
+                device = await BleakScanner.find_device_by_filter(self.is_target_device, timeout=20.0)
+                if device is None:
+                    continue
                 
-                for device in devices:
-                    if device.name and self.device_name in device.name:
-                        self.device_address = device.address
-                        self.signals.device_found.emit(f"Found {device.name} at {self.device_address}")
-                        
-                        # Stop scanning and connect
-                        self.is_scanning = False
-                        await self.connect_to_device()
-                        return
-                
-                # Wait before scanning again
-                await asyncio.sleep(2)
+                self.device_address = device.address
+                self.signals.device_found.emit(f"Found {device.name} at {self.device_address}")
+                self.is_scanning = False
                 
             except Exception as e:
                 self.signals.connection_status.emit(False, f"Scan error: {str(e)}")
                 await asyncio.sleep(5)  # Wait before retrying
     
     async def connect_to_device(self):
-        """Connect to the BLE device and set up notifications"""
+        """Connect to the BLE device and set up notifications; return True on success"""
         try:
             self.signals.connection_status.emit(False, f"Connecting to {self.device_name}...")
             
             # Create client and connect
-            self.client = BleakClient(self.device_address)
+            self.client = BleakClient(self.device_address, disconnected_callback=self.on_disconnected)
             await self.client.connect()
             
-            if self.client.is_connected:
-                self.is_connected = True
-                self.signals.connection_status.emit(True, f"Connected to {self.device_name}")
-                
-                # Start listening for notifications
-                await self.client.start_notify(BLE_CHARACTERISTIC_UUID, self.notification_handler)
-                
-                # Start monitoring connection
-                asyncio.create_task(self.connection_monitor())
-            else:
+            if not self.client.is_connected:
                 self.signals.connection_status.emit(False, "Connection failed")
-                self.is_scanning = True
-                asyncio.create_task(self.scan_and_connect())
+                self.device_address = None
+                self.client = None
+                return False
+            
+            self.is_connected = True
+            self.save_cached_address()
+            
+            # The OS negotiates the MTU on connect, but BlueZ only reports
+            # the negotiated value after it has been acquired explicitly
+            backend = getattr(self.client, "_backend", None)
+            if hasattr(backend, "_acquire_mtu"):
+                try:
+                    await backend._acquire_mtu()
+                except Exception as e:
+                    print(f"Could not acquire MTU: {str(e)}")
+            
+            self.signals.connection_status.emit(
+                True, f"Connected to {self.device_name} (MTU {self.client.mtu_size})"
+            )
+            
+            # Resolve the characteristic once so writes skip the UUID lookup
+            self.characteristic = (
+                self.client.services.get_characteristic(BLE_CHARACTERISTIC_UUID)
+                or BLE_CHARACTERISTIC_UUID
+            )
+            
+            # Start listening for notifications
+            await self.client.start_notify(self.characteristic, self.notification_handler)
+            return True
                 
         except Exception as e:
             self.signals.connection_status.emit(False, f"Connection error: {str(e)}")
-            self.is_scanning = True
-            await asyncio.sleep(5)
-            asyncio.create_task(self.scan_and_connect())
+            self.is_connected = False
+            self.device_address = None
+            
+            # Release a half-set-up connection before trying again
+            client, self.client = self.client, None
+            if client is not None:
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+            return False
     
     def notification_handler(self, sender, data):
         """Handle incoming BLE notifications/chunks"""
         try:
-            # Decode the received chunk
-            chunk = data.decode('utf-8')
-            self.signals.data_received.emit(chunk)
+            now = self.loop.time()
+            closed = data.count(b"]")
+            depth = self._bracket_depth + data.count(b"[") - closed
+            
+            # The rest of an oversized transmission is dropped up to its closing
+            # bracket, or until the device pauses, so its tail is never parsed
+            if self._discarding:
+                if now - self._last_chunk_ts < RX_CHUNK_TIMEOUT:
+                    self._last_chunk_ts = now
+                    self._bracket_depth = depth
+                    if closed and depth <= 0:
+                        self.reset_receive_buffer()
+                    return
+                # The dropped transmission went quiet, so this packet starts a new one
+                self.reset_receive_buffer()
+                depth = data.count(b"[") - closed
+            
+            # Copy the raw bytes into the receive buffer; decoding happens once the
+            # transmission is complete so multi-byte characters split across
+            # packets stay intact
+            end = self._rx_len + len(data)
+            if end > RX_BUFFER_SIZE:
+                print(f"Receive buffer overflow ({end} bytes), dropping transmission")
+                self.signals.connection_status.emit(True, "Transmission too large, dropped")
+                self.reset_receive_buffer()
+                self.chunks_in_progress = False
+                if not (closed and depth <= 0):
+                    self._discarding = True
+                    self._bracket_depth = depth
+                    self._last_chunk_ts = now
+                return
+            self._rx[self._rx_len:end] = data
+            self._rx_len = end
+            self.chunk_count += 1
+            
+            # Only a short preview is sent to the UI, at most every 100 ms, so a
+            # burst of packets does not relayout the label for each one
+            if now - self._last_preview_emit >= 0.1:
+                self._last_preview_emit = now
+                self.signals.data_received.emit(data[:32].hex())
+            
+            first_chunk = self._transmission_start == 0
+            if first_chunk:
+                self._transmission_start = now
+                self.signals.connection_status.emit(True, "Data transmission started")
             
-            # Add to our chunks list
-            self.received_chunks.append(chunk)
+            # The payload is framed by "[" ... "]", so the transmission is complete
+            # as soon as the closing bracket of the outermost list arrives
+            self._bracket_depth = depth
+            if depth < 0:
+                # More closing than opening brackets: not a payload we can parse
+                print("Unbalanced brackets in transmission, dropping it")
+                self.reset_receive_buffer()
+                self.chunks_in_progress = False
+                return
+            if closed and depth == 0:
+                self.complete_transmission()
+                return
             
-            # Update the connection monitor so it knows we got a chunk
             self.chunks_in_progress = True
+            self._last_chunk_ts = now
+            
+            # Only the first chunk needs to wake the connection monitor; after that
+            # it sleeps until the timeout deadline, which later chunks push back
+            if first_chunk:
+                self._chunk_event.set()
             
         except Exception as e:
             print(f"Error processing notification: {str(e)}")
     
+    def reset_receive_buffer(self):
+        """Discard any partially received transmission"""
+        self._rx_len = 0
+        self.chunk_count = 0
+        self._bracket_depth = 0
+        self._transmission_start = 0
+        self._discarding = False
+    
+    def complete_transmission(self):
+        """Hand the received data to the UI and reset the receive state"""
+        self.signals.connection_status.emit(True, f"Data transmission complete ({self._rx_len} bytes)")
+        self.chunks_in_progress = False
+        
+        # Slice through a memoryview so the buffer is copied only once
+        payload = bytes(memoryview(self._rx)[:self._rx_len])
+        self.reset_receive_buffer()
+        
+        self.signals.chunks_complete.emit(payload)
+    
+    def on_disconnected(self, client):
+        """Called by bleak when the device disconnects"""
+        # Ignore late callbacks from a client that has already been replaced
+        if client is not self.client:
+            return
+        self.is_connected = False
+        
+        # Wake the connection monitor so it can start reconnecting
+        self._chunk_event.set()
+    
     async def connection_monitor(self):
-        """Monitor the connection status and reconnect if needed"""
+        """Complete transmissions that never send a closing bracket and reconnect if needed"""
+        chunk_timeout = RX_CHUNK_TIMEOUT
         total_timeout = 30.0  # Maximum time (seconds) to wait for a complete transmission
-        transmission_start_time = 0
         
-        while True:
-            if not self.is_connected or not self.client.is_connected:
-                self.is_connected = False
-                self.signals.connection_status.emit(False, "Connection lost, reconnecting...")
-                self.is_scanning = True
-                await self.client.disconnect()
-                self.client = None
-                asyncio.create_task(self.scan_and_connect())
-                return
+        while self.is_connected:
+            # Sleep until a transmission starts or the device disconnects; while a
+            # transmission is in progress, sleep until the nearest timeout instead
+            timeout = None
+            if self._rx_len:
+                deadline = min(self._last_chunk_ts + chunk_timeout,
+                               self._transmission_start + total_timeout)
+                timeout = max(0.0, deadline - self.loop.time())
+            try:
+                await asyncio.wait_for(self._chunk_event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._chunk_event.clear()
             
-            current_time = time.time()
+            if not self.is_connected:
+                break
             
-            # If we've started receiving chunks, update the start time
-            if self.chunks_in_progress and self.received_chunks and transmission_start_time == 0:
-                transmission_start_time = current_time
-                self.signals.connection_status.emit(True, "Data transmission started")
+            current_time = self.loop.time()
             
-            # Check if transmission should be considered complete
-            if self.chunks_in_progress and self.received_chunks:
-                # Conditions to consider transmission complete:
-                # 1. Any chunk contains a closing bracket "]"
-                # 2. Total transmission time has exceeded total_timeout seconds
-                if (any("]" in chunk for chunk in self.received_chunks)) or \
-                   (transmission_start_time > 0 and current_time - transmission_start_time > total_timeout):
-                    
-                    self.signals.connection_status.emit(True, "Data transmission complete")
-                    self.chunks_in_progress = False
-                    
-                    # Make a copy of the chunks to avoid race conditions
-                    chunks_copy = self.received_chunks.copy()
-                    self.received_chunks = []
-                    
-                    # Reset transmission tracking
-                    transmission_start_time = 0
-                    
-                    # Emit the complete signal with collected chunks
-                    self.signals.chunks_complete.emit(chunks_copy)
-            
-            await asyncio.sleep(0.1)
+            # Safety net for payloads without brackets (e.g. battery life) or
+            # transmissions that lost their closing bracket:
+            # 1. No chunk has arrived for chunk_timeout seconds
+            # 2. Total transmission time has exceeded total_timeout seconds
+            if self.chunks_in_progress and self._rx_len:
+                if (current_time - self._last_chunk_ts >= chunk_timeout) or \
+                   (current_time - self._transmission_start >= total_timeout):
+                    self.complete_transmission()
+        
+        # Connection was lost; the supervisor reconnects. A transmission cut off
+        # by the loss is dropped, so it is not completed on the next connection
+        self.reset_receive_buffer()
+        self.chunks_in_progress = False
+        self.signals.connection_status.emit(False, "Connection lost, reconnecting...")
+        self.client = None
     
     async def send_command(self, battery_num, measurement_type, measurement_count):
         """Send command to the BLE device"""
-        if not self.is_connected:
+        if not self.is_connected or self.client is None:
             self.signals.connection_status.emit(False, "Cannot send command: Not connected")
             return False
         
         try:
-            command = f"{battery_num};{measurement_type};{measurement_count}"
+            command = encode_command(battery_num, measurement_type, measurement_count)
             
             # Clear any previous chunks
-            self.received_chunks = []
+            self.reset_receive_buffer()
             self.chunks_in_progress = True
             
             # Send the command
-            await self.client.write_gatt_char(BLE_CHARACTERISTIC_UUID, command.encode())
-            self.signals.connection_status.emit(True, f"Sent command: {command}")
+            await self.client.write_gatt_char(self.characteristic, command)
+            self.signals.connection_status.emit(True, f"Sent command: {command.decode()}")
             return True
             
         except Exception as e:
             self.signals.connection_status.emit(True, f"Error sending command: {str(e)}")
             return False
 
+class Series:
+    """Growable array of samples backed by a preallocated NumPy buffer"""
+    def __init__(self, values=(), dtype=SAMPLE_DTYPE):
+        values = np.asarray(values, dtype=dtype).reshape(-1)
+        self.n = len(values)
+        if self.n:
+            # Use the array as the buffer; it is exactly full, so the first
+            # write grows it into a new buffer and never touches the caller's data
+            self.values = values
+            self.cap = self.n
+        else:
+            self.cap = 16
+            self.values = np.empty(self.cap, dtype=dtype)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        return self.values[:self.n][index]
+
+    def __array__(self, dtype=None, copy=None):
+        # Lets np.asarray() and matplotlib use the buffer directly instead of
+        # iterating over the samples through __getitem__
+        values = self.values[:self.n]
+        if dtype is not None and dtype != values.dtype:
+            return values.astype(dtype)
+        return values.copy() if copy else values
+
+    def array(self):
+        """Return a view of the stored samples"""
+        return self.values[:self.n]
+
+    def append(self, value):
+        if self.n == self.cap:
+            self._grow(self.n + 1)
+        self.values[self.n] = value
+        self.n += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.values.dtype)
+        end = self.n + len(values)
+        if end > self.cap:
+            self._grow(end)
+        self.values[self.n:end] = values
+        self.n = end
+
+    def share(self):
+        """Return a new Series over the same samples without copying them"""
+        # The new Series starts exactly full, so its first write grows it into
+        # a buffer of its own and never changes the samples seen by this one
+        return Series(self.array(), dtype=self.values.dtype)
+
+    def tolist(self):
+        values = self.array()
+        if values.dtype == np.float32:
+            # Go through the shortest float32 repr so 3.3 is exported as 3.3
+            # rather than 3.299999952316284
+            return values.astype(str).astype(np.float64).tolist()
+        return values.tolist()
+
+    def _grow(self, min_cap):
+        """Double the capacity until min_cap samples fit (amortized O(1) appends)"""
+        cap = self.cap
+        while cap < min_cap:
+            cap *= 2
+        self.values = np.resize(self.values, cap)
+        self.cap = cap
+
+
+class ParameterListModel(QAbstractListModel):
+    """Checkable list of data keys; the view only paints the rows that are visible"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.keys = []
+        self.checked = np.zeros(0, dtype=bool)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.keys)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.keys[index.row()]
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if self.checked[index.row()] else Qt.Unchecked
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid():
+            return False
+        self.checked[index.row()] = value == Qt.Checked
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def set_keys(self, keys):
+        """Show these keys; keys that were already listed keep their checked state, new ones start checked"""
+        was_checked = dict(zip(self.keys, self.checked.tolist()))
+        self.beginResetModel()
+        self.keys = list(keys)
+        self.checked = np.array([was_checked.get(key, True) for key in self.keys], dtype=bool)
+        self.endResetModel()
+
+    def checked_keys(self):
+        return [self.keys[i] for i in np.flatnonzero(self.checked)]
+
+
 class BatteryDataViewer(QWidget):
+    # Built once for the class; applyStyles only hands it to Qt
+    _STYLESHEET = """
+        QWidget {
+            background-color: #F2EBCC;
+            color: #212121;
+            selection-background-color: #1976D2;
+            selection-color: #FFFFFF;  
+        }
+        QPushButton {
+            background-color: #CDE5D9;
+            border: 1px solid #90CAF9;
+            border-bottom: 2px solid #B0BEC5;  /* Static glow, cheaper than a blur effect */
+            padding: 8px 12px;
+            border-radius: 6px;
+            font-weight: bold;
+            font-size: 13px;
+            color: #0D47A1;
+        }
+        QPushButton:hover {
+        background-color: #E3F2FD;
+        border: 1px solid #1976D2;
+        }
+        QPushButton:disabled {
+            background-color: #E0E0E0;
+            border-color: #BDBDBD;
+            color: #9E9E9E;
+        }
+        QLabel {
+            font-size: 13px;
+            font-weight: bold;
+            color: #212121;
+            background-color: #FFFFFF;
+            padding: 8px;
+            border-radius: 6px;
+            border: 1px solid #E0E0E0;
+            border-bottom: 2px solid #B0BEC5;
+        }
+        QListView::item {
+            font-size: 13px;
+            padding: 5px;
+            color: #212121;
+            background-color: transparent;
+        }
+        QListView::indicator {
+            width: 16px;
+            height: 16px;
+        }
+        QProgressBar {
+            border: 1px solid #90CAF9;
+            border-radius: 4px;
+            text-align: center;
+            background-color: #E3F2FD;
+            height: 10px;
+        }
+        QProgressBar::chunk {
+            background-color: #1976D2;
+        }
+        QGroupBox {
+            font-size: 13px;
+            font-weight: bold;
+            border: 1px solid #90CAF9;
+            border-radius: 6px;
+            margin-top: 1ex;
+            padding: 10px;
+            background-color: #FFFFFF;
+            color: #212121;
+        }
+        QGroupBox::title {
+            subcontrol-origin: margin;
+            subcontrol-position: top center;
+            padding: 0 5px;
+            color: #1565C0;
+        }
+        QComboBox {
+            border: 1px solid #B0BEC5;
+            border-radius: 4px;
+            padding: 6px 10px;
+            background-color: #FFFFFF;
+            color: #212121;
+            min-height: 28px;
+            min-width: 160px;  /* Make measurement field wider */
+            selection-background-color: #1976D2;
+            selection-color: #FFFFFF;
+        }
+        QSpinBox {
+            border: 1px solid #B0BEC5;
+            border-radius: 4px;
+            padding: 6px 8px;
+            background-color: #FFFFFF;
+            color: #212121;
+            min-height: 28px;
+        }
+        QListView {
+            border: 1px solid #CFD8DC;
+            border-radius: 6px;
+            background-color: #FFFFFF;
+        }
+        QLineEdit {
+            border: 1px solid #B0BEC5;
+            border-radius: 4px;
+            padding: 6px 8px;
+            background-color: #FFFFFF;
+            color: #212121;
+            selection-background-color: #1976D2;
+            selection-color: #FFFFFF;
+            font-weight: bold;
+        }
+    """
+    _GLOW_COLOR = QColor("#B0BEC5")
+
     def __init__(self):
         super().__init__()
 
         self.data = {
-            "time": [],
+            "time": Series(dtype=TIME_DTYPE),
         }
-        self.timestamps = []
+        self.timestamps = self.data["time"]
         self.selected_keys = []  # User-selected parameters
+        self.param_model = ParameterListModel(self)  # One checkable row per data key
+        self._fmt = {}  # Data key -> display format used by show_recent
+        self._kind = {}  # Data key -> kind of measurement (VALUE_FORMATS key) or None
+        self._json_cache = OrderedDict()  # (path, mtime, size) -> parsed data, LRU order
+        self._fig = None  # Plot window, reused across plot_data calls
+        self._ax = None
+        self._lines = {}  # Data key -> Line2D in the plot window, updated in place on replot
+        self._plot_keep = {}  # Data key -> (Series, (length, columns), M4 indices) from the last plot
         self.current_battery = 1
         self.current_measurement_type = "Voltage"
         self.current_measurement_count = 100
@@ -205,6 +737,8 @@ class BatteryDataViewer(QWidget):
         self.bluetooth_worker = BluetoothWorker()
         self.setup_bluetooth_signals()
         self.bluetooth_worker.start()
+        
+        asyncio.get_event_loop().run_in_executor(None, compile_m4_kernel)
 
         self.initUI()
         self.applyStyles()
@@ -225,19 +759,24 @@ class BatteryDataViewer(QWidget):
         self.status_label.setText(message)
         self.connection_indicator.setValue(100 if connected else 0)
         self.request_button.setEnabled(connected)
+        self.request_button.graphicsEffect().setEnabled(connected)
 
     def on_data_chunk_received(self, chunk):
-        """Handle a single chunk of data from the BLE device"""
-        self.data_label.setText(f"Receiving data... (Chunk received)")
+        """Show receive progress (called at most every 100 ms during a transmission)"""
+        self.data_label.setText(f"Receiving data... ({self.bluetooth_worker.chunk_count} chunks received)")
 
-    def on_data_complete(self, chunks):
-        """Process all received chunks once complete"""
-        if not chunks:
+    def on_data_complete(self, payload):
+        """Process the received data once the transmission is complete"""
+        if not payload:
             self.data_label.setText("No data received")
             return
         
-        # Join all chunks together
-        full_data = ''.join(chunks)
+        # Decode the whole transmission once
+        try:
+            full_data = payload.decode('utf-8')
+        except UnicodeDecodeError as e:
+            self.data_label.setText(f"Error decoding received data: {str(e)}")
+            return
         self.data_label.setText(f"Data received: {full_data}")
         
         try:
@@ -248,14 +787,7 @@ class BatteryDataViewer(QWidget):
                     cleaned_data = full_data.strip()
                     battery_life = float(cleaned_data)
                     
-                    measurement_key = "life"
-                    base_time = time.time()
-                    
-                    self.data[measurement_key] = []
-                    self.data["time"] = []
-                    
-                    self.data["time"].append(base_time)
-                    self.data[measurement_key].append(battery_life)
+                    self.store_measurement("life", [battery_life])
                     
                     self.update_checkboxes()
                     self.show_recent()
@@ -265,47 +797,21 @@ class BatteryDataViewer(QWidget):
                     return
             
             if full_data.strip() and ('[' in full_data or ']' in full_data):
-                cleaned_data = self.clean_data_string(full_data)
-                
-                values = self.parse_numeric_values(cleaned_data)
-                
-                base_time = time.time()
+                values = self.parse_payload(full_data)
                 
-                measurement_key = self.current_measurement_type.lower()
-                self.data[measurement_key] = []
-                self.data["time"] = []
-                
-                for i, value in enumerate(values):
-                    calculated_time = base_time + (i * 0.01)
-                    self.data["time"].append(calculated_time)
-                    self.data[measurement_key].append(value)
+                self.store_measurement(self.current_measurement_type.lower(), values)
                 
                 self.update_checkboxes()
                 self.show_recent()
             else:
                 # Handle the case of a single value (not in a list)
                 try:
-                    # Clean up the data regardless of format
-                    cleaned_data = self.clean_data_string(full_data)
-                    
                     # Parse the data values
-                    values = self.parse_numeric_values(cleaned_data)
+                    values = self.parse_payload(full_data)
                     
-                    if values:  # Make sure we have values to process
-                        # Use fixed time interval of 10ms between measurements
-                        base_time = time.time()  # Current time as base
-                        
+                    if len(values):  # Make sure we have values to process
                         # Add the measurement data with the current measurement type as the key
-                        measurement_key = self.current_measurement_type.lower()
-                        
-                        self.data[measurement_key] = []
-                        self.data["time"] = []
-                        
-                        # Add each value with a calculated timestamp (10ms intervals)
-                        for i, value in enumerate(values):
-                            calculated_time = base_time + (i * 0.01)  # 10ms = 0.01 seconds
-                            self.data["time"].append(calculated_time)
-                            self.data[measurement_key].append(value)
+                        self.store_measurement(self.current_measurement_type.lower(), values)
                         
                         # Update the UI to show we have new data
                         self.update_checkboxes()
@@ -318,31 +824,47 @@ class BatteryDataViewer(QWidget):
         except Exception as e:
             self.data_label.setText(f"Error processing data: {str(e)}")
     
+    def store_measurement(self, measurement_key, values):
+        """Replace a measurement series with a new burst of values, spaced 10ms apart"""
+        values = np.asarray(values, dtype=SAMPLE_DTYPE)
+        
+        # Bulk-copy the values and generate all timestamps in one vector operation
+        self.data[measurement_key] = Series(values)
+        self.data["time"] = Series(time.time() + np.arange(len(values)) * 0.01, dtype=TIME_DTYPE)
+    
+    def parse_payload(self, data_string):
+        """Parse a BLE payload into a float32 array."""
+        # Well-formed payloads are JSON and are parsed in C in one go; anything
+        # else (extra spaces, repeated commas, ...) goes through the cleaner
+        try:
+            parsed = json_loads(data_string)
+        except (ValueError, TypeError):
+            parsed = None
+        # Only a number or a flat list of numbers is taken as is; null, true,
+        # strings and nested lists are left to the cleaner like other bad input
+        if type(parsed) in (int, float):
+            return np.array([parsed], dtype=SAMPLE_DTYPE)
+        if type(parsed) is list and all(type(v) in (int, float) for v in parsed):
+            return np.array(parsed, dtype=SAMPLE_DTYPE)
+        
+        cleaned_data = self.clean_data_string(data_string)
+        if not cleaned_data:
+            return np.empty(0, dtype=SAMPLE_DTYPE)
+        try:
+            # Convert all values in a single C-level pass
+            return np.array(cleaned_data.split(','), dtype=SAMPLE_DTYPE)
+        except ValueError:
+            # Some values are not numeric; convert one by one and skip those
+            return np.asarray(self.parse_numeric_values(cleaned_data), dtype=SAMPLE_DTYPE)
+
     def clean_data_string(self, data_string):
         """Clean up data string with extra spaces or commas."""
         # Remove the brackets
-        data_string = data_string.strip()
-        if data_string.startswith('['):
-            data_string = data_string[1:]
-        if data_string.endswith(']'):
-            data_string = data_string[:-1]
-        
-        # Replace multiple spaces with a single space
-        data_string = re.sub(r'\s+', ' ', data_string)
-        
-        # Replace multiple commas with a single comma
-        data_string = re.sub(r',+', ',', data_string)
-        
-        # Replace space comma with just comma
-        data_string = re.sub(r'\s*,\s*', ',', data_string)
-        
-        # Replace space with comma to standardize
-        data_string = re.sub(r'\s+', ',', data_string)
-        
-        # Remove any commas at the start or end
-        data_string = data_string.strip(',')
+        data_string = data_string.strip().lstrip('[').rstrip(']')
         
-        return data_string
+        # Collapse every run of spaces and/or commas into a single comma, then
+        # remove any commas at the start or end
+        return SEPARATOR_RE.sub(',', data_string).strip(',')
 
     def parse_numeric_values(self, cleaned_data):
         """Parse numeric values from a cleaned data string."""
@@ -375,17 +897,21 @@ class BatteryDataViewer(QWidget):
         self.current_measurement_type = measurement_type
         self.current_measurement_count = count
         
-        # Make async call to send command
-        def send():
-            asyncio.run_coroutine_threadsafe(
-                self.bluetooth_worker.send_command(battery, measurement_type, count),
-                self.bluetooth_worker.loop
-            )
-        
-        # Run in thread to avoid blocking UI
-        threading.Thread(target=send).start()
+        # Schedule the command on the shared event loop; this returns immediately
+        task = self.bluetooth_worker.spawn(
+            self.bluetooth_worker.send_command(battery, measurement_type, count)
+        )
+        task.add_done_callback(self.on_command_done)
         self.data_label.setText(f"Sending request to battery {battery} for {count} {measurement_type} measurements...")
 
+    def on_command_done(self, task):
+        """Report unexpected errors from send_command"""
+        if task.cancelled() or task.exception() is None:
+            return
+        self.on_connection_status(
+            self.bluetooth_worker.is_connected, f"Error sending command: {str(task.exception())}"
+        )
+
     def initUI(self):
         """Initialize the GUI layout and components."""
         layout = QVBoxLayout()
@@ -395,7 +921,6 @@ class BatteryDataViewer(QWidget):
         
         self.status_label = QLabel("Starting Bluetooth scanner...")
         self.status_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        self.addGlowEffect(self.status_label)
         bluetooth_layout.addWidget(self.status_label, 7)
         
         self.connection_indicator = QProgressBar()
@@ -436,44 +961,38 @@ class BatteryDataViewer(QWidget):
         self.request_button.clicked.connect(self.send_request)
         self.request_button.setEnabled(False)  # Disabled until connected
         self.addGlowEffect(self.request_button)
+        self.request_button.graphicsEffect().setEnabled(False)  # No glow while disabled
         layout.addWidget(self.request_button)
         
         # Load data button
         self.load_button = QPushButton("Load Battery Data")
         self.load_button.clicked.connect(self.load_data)
-        self.addGlowEffect(self.load_button)
         layout.addWidget(self.load_button)
 
         # Display loaded data info
         self.data_label = QLabel("No data loaded.")
         self.data_label.setAlignment(Qt.AlignCenter)
-        self.addGlowEffect(self.data_label)
         layout.addWidget(self.data_label)
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.checkbox_container = QWidget()
-        self.checkbox_container.setStyleSheet("background-color: #FFFFFF;")
-        self.checkbox_layout = QVBoxLayout(self.checkbox_container)
-        self.scroll_area.setWidget(self.checkbox_container)
-        layout.addWidget(self.scroll_area)
+        # A model-backed list instead of one QCheckBox widget per data key
+        self.param_list = QListView()
+        self.param_list.setUniformItemSizes(True)
+        self.param_list.setModel(self.param_model)
+        layout.addWidget(self.param_list)
 
         # Buttons to show data
         button_layout = QHBoxLayout()
 
         self.show_recent_button = QPushButton("Show Latest Data")
         self.show_recent_button.clicked.connect(self.show_recent)
-        self.addGlowEffect(self.show_recent_button)
         button_layout.addWidget(self.show_recent_button)
 
         self.plot_button = QPushButton("Plot Data Over Time")
         self.plot_button.clicked.connect(self.plot_data)
-        self.addGlowEffect(self.plot_button)
         button_layout.addWidget(self.plot_button)
 
         self.export_button = QPushButton("Export Data")
         self.export_button.clicked.connect(self.export_debug_json)
-        self.addGlowEffect(self.export_button)
         button_layout.addWidget(self.export_button)
 
         layout.addLayout(button_layout)
@@ -487,128 +1006,16 @@ class BatteryDataViewer(QWidget):
         icon_pixmap.fill(QColor("#0D6EFD"))
         self.setWindowIcon(QIcon(icon_pixmap))
 
-        self.setBackgroundImage()
-
     def addGlowEffect(self, widget):
+        """Drop shadow for the primary button only; it is re-blurred on every paint"""
         shadow = QGraphicsDropShadowEffect()
         shadow.setBlurRadius(8)
-        shadow.setColor(QColor("#B0BEC5"))
+        shadow.setColor(self._GLOW_COLOR)
         shadow.setOffset(0, 2)
         widget.setGraphicsEffect(shadow)
 
-    def setBackgroundImage(self):
-        self.setStyleSheet("background-color: #F2EBCC;")
-
-    def resizeEvent(self, event):
-        self.setBackgroundImage()
-        super().resizeEvent(event)
-
     def applyStyles(self):
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #FAFAFA;
-                color: #212121;
-                selection-background-color: #1976D2;
-                selection-color: #FFFFFF;  
-            }
-            QPushButton {
-                background-color: #CDE5D9;
-                border: 1px solid #90CAF9;
-                padding: 8px 12px;
-                border-radius: 6px;
-                font-weight: bold;
-                font-size: 13px;
-                color: #0D47A1;
-            }
-            QPushButton:hover {
-            background-color: #E3F2FD;
-            border: 1px solid #1976D2;
-            }
-            QPushButton:disabled {
-                background-color: #E0E0E0;
-                border-color: #BDBDBD;
-                color: #9E9E9E;
-            }
-            QLabel {
-                font-size: 13px;
-                font-weight: bold;
-                color: #212121;
-                background-color: #FFFFFF;
-                padding: 8px;
-                border-radius: 6px;
-                border: 1px solid #E0E0E0;
-            }
-            QCheckBox {
-                font-size: 13px;
-                padding: 5px;
-                color: #212121;
-                background-color: transparent;
-            }
-            QCheckBox::indicator {
-                width: 16px;
-                height: 16px;
-            }
-            QProgressBar {
-                border: 1px solid #90CAF9;
-                border-radius: 4px;
-                text-align: center;
-                background-color: #E3F2FD;
-                height: 10px;
-            }
-            QProgressBar::chunk {
-                background-color: #1976D2;
-            }
-            QGroupBox {
-                font-size: 13px;
-                font-weight: bold;
-                border: 1px solid #90CAF9;
-                border-radius: 6px;
-                margin-top: 1ex;
-                padding: 10px;
-                background-color: #FFFFFF;
-                color: #212121;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                subcontrol-position: top center;
-                padding: 0 5px;
-                color: #1565C0;
-            }
-            QComboBox {
-                border: 1px solid #B0BEC5;
-                border-radius: 4px;
-                padding: 6px 10px;
-                background-color: #FFFFFF;
-                color: #212121;
-                min-height: 28px;
-                min-width: 160px;  /* Make measurement field wider */
-                selection-background-color: #1976D2;
-                selection-color: #FFFFFF;
-            }
-            QSpinBox {
-                border: 1px solid #B0BEC5;
-                border-radius: 4px;
-                padding: 6px 8px;
-                background-color: #FFFFFF;
-                color: #212121;
-                min-height: 28px;
-            }
-            QScrollArea {
-                border: 1px solid #CFD8DC;
-                border-radius: 6px;
-                background-color: #FFFFFF;
-            }
-            QLineEdit {
-                border: 1px solid #B0BEC5;
-                border-radius: 4px;
-                padding: 6px 8px;
-                background-color: #FFFFFF;
-                color: #212121;
-                selection-background-color: #1976D2;
-                selection-color: #FFFFFF;
-                font-weight: bold;
-            }
-        """)
+        self.setStyleSheet(self._STYLESHEET)
 
         font = QFont("Segoe UI", 11)
         self.data_label.setFont(font)
@@ -621,8 +1028,160 @@ class BatteryDataViewer(QWidget):
             QMessageBox.warning(self, "No File Selected", "⚠️ You must select a data file!", QMessageBox.Ok)
             return
 
-        with open(file_name, 'r') as file:
-            loaded_data = json.load(file)
+        # Reopening an unchanged file reuses the data parsed the last time
+        try:
+            st = os.stat(file_name)
+            cache_key = (os.path.realpath(file_name), st.st_mtime_ns, st.st_size)
+        except OSError:
+            cache_key = None
+        if cache_key in self._json_cache:
+            self._json_cache.move_to_end(cache_key)
+            self.install_loaded_data(file_name, self._json_cache[cache_key])
+            return
+
+        # Read and parse the file on a worker thread so the UI stays responsive
+        self.load_button.setEnabled(False)
+        self.data_label.setText(f"Loading {os.path.basename(file_name)}...")
+        future = asyncio.get_event_loop().run_in_executor(None, self.read_data_file, file_name)
+        future.add_done_callback(functools.partial(self.on_data_loaded, file_name, cache_key))
+
+    @staticmethod
+    def read_data_file(file_name):
+        """Parse a JSON data file into Series (runs on a worker thread)"""
+        # Stat before parsing, so a file that changes meanwhile no longer matches its sidecar
+        st = os.stat(file_name)
+        size = st.st_size
+        source = [st.st_size, st.st_mtime_ns]
+        sidecar = file_name + SIDECAR_SUFFIX
+        if size >= SIDECAR_MIN_BYTES:
+            try:
+                return BatteryDataViewer.read_sidecar_file(sidecar, source)
+            except Exception:
+                pass  # Missing, stale or unreadable sidecar; parse the JSON
+        
+        loaded_data = BatteryDataViewer.parse_data_file(file_name, size)
+        
+        if size >= SIDECAR_MIN_BYTES:
+            BatteryDataViewer.write_sidecar_file(sidecar, source, loaded_data)
+        return loaded_data
+
+    @staticmethod
+    def parse_data_file(file_name, size):
+        """Parse the JSON itself, streaming it if ijson is available and it is very large"""
+        if ijson is not None and size > STREAM_LOAD_MIN_BYTES:
+            return BatteryDataViewer.stream_data_file(file_name)
+        
+        with open(file_name, 'rb') as file:
+            parsed = json_loads(file.read())
+        
+        # Channels of equal length are converted in one pass into a single
+        # contiguous float32 block, one row per channel, that their Series share
+        channels = [key for key in parsed if key != "time"]
+        rows = {}
+        if len(channels) > 1 and all(isinstance(parsed[key], list) for key in channels) \
+                and len({len(parsed[key]) for key in channels}) == 1:
+            block = np.array([parsed[key] for key in channels], dtype=SAMPLE_DTYPE)
+            rows = dict(zip(channels, block))
+        
+        return {
+            key: Series(rows[key]) if key in rows
+            else Series(values, dtype=TIME_DTYPE if key == "time" else SAMPLE_DTYPE)
+            for key, values in parsed.items()
+        }
+
+    @staticmethod
+    def read_sidecar_file(sidecar, source):
+        """Load the arrays saved by write_sidecar_file for the same [size, mtime_ns] of the JSON"""
+        loaded_data = {}
+        with zipfile.ZipFile(sidecar) as npz:
+            index = json.loads(npz.read("keys.json"))
+            # Any change to the JSON, including a copy with an older date, makes
+            # the sidecar stale (the same key as the in-memory cache in load_data)
+            if index["source"] != source:
+                raise ValueError(f"{sidecar} is not for the current data file")
+            for i, key in enumerate(index["keys"]):
+                with npz.open(f"{i}.npy") as entry:
+                    values = np.lib.format.read_array(entry, allow_pickle=False)
+                loaded_data[key] = Series(values, dtype=TIME_DTYPE if key == "time" else SAMPLE_DTYPE)
+        return loaded_data
+
+    @staticmethod
+    def write_sidecar_file(sidecar, source, loaded_data):
+        """Save the parsed arrays next to the data file for faster reloads"""
+        # Entries are named by position, with the data keys listed in keys.json
+        # next to the size and mtime of the JSON they were parsed from, so any
+        # key is safe to store; the file is still a plain .npz archive.
+        # It is written to a temporary name first so a partial sidecar is never loaded.
+        partial = sidecar + ".part"
+        try:
+            with zipfile.ZipFile(partial, 'w', zipfile.ZIP_STORED) as npz:
+                npz.writestr("keys.json", json.dumps({"source": source, "keys": list(loaded_data)}))
+                for i, series in enumerate(loaded_data.values()):
+                    with npz.open(f"{i}.npy", 'w', force_zip64=True) as entry:
+                        np.lib.format.write_array(entry, series.array(), allow_pickle=False)
+            os.replace(partial, sidecar)
+        except Exception as e:
+            # The sidecar is only a speed-up; the JSON has loaded either way
+            print(f"Could not write {sidecar}: {str(e)}")
+        finally:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+
+    @staticmethod
+    def stream_data_file(file_name):
+        """Parse a large JSON data file value by value into flat buffers"""
+        # Unlike json_loads, this never holds a Python float object per sample,
+        # so memory stays close to 8 bytes per value
+        # Samples match parse_data_file: null becomes NaN (keeping later samples
+        # aligned with "time") and a single number becomes a one-sample series
+        buffers = {}
+        key = item = None
+        nan = float('nan')
+        with open(file_name, 'rb') as file:
+            for prefix, event, value in ijson.parse(file, use_float=True):
+                if prefix == item:
+                    if event == 'number':
+                        buffers[key].append(value)
+                    elif event == 'null':
+                        buffers[key].append(nan)
+                elif event == 'map_key' and prefix == '':
+                    key, item = value, f"{value}.item"
+                    buffers[key] = array('d')
+                elif prefix == key:
+                    if event == 'number':
+                        buffers[key].append(value)
+                    elif event == 'null':
+                        buffers[key].append(nan)
+        
+        return {
+            key: Series(np.frombuffer(buffer, dtype=np.float64),
+                        dtype=TIME_DTYPE if key == "time" else SAMPLE_DTYPE)
+            for key, buffer in buffers.items()
+        }
+
+    def on_data_loaded(self, file_name, cache_key, future):
+        """Cache and install the data parsed by read_data_file (runs on the UI thread)"""
+        self.load_button.setEnabled(True)
+        try:
+            loaded_data = future.result()
+        except Exception as e:
+            self.data_label.setText("No data loaded.")
+            QMessageBox.critical(self, "Load Failed", f"❌ Failed to load data:\n{str(e)}")
+            return
+        
+        if cache_key is not None:
+            self._json_cache[cache_key] = loaded_data
+            if len(self._json_cache) > JSON_CACHE_SIZE:
+                self._json_cache.popitem(last=False)
+        
+        self.install_loaded_data(file_name, loaded_data)
+
+    def install_loaded_data(self, file_name, loaded_data):
+        """Replace or merge the current data with data loaded from a file"""
+        # Work on shared copies so later changes to self.data never leak into the cache
+        loaded_data = {key: series.share() for key, series in loaded_data.items()}
         
         # Merge with existing data or replace it
         if not self.data or QMessageBox.question(
@@ -640,33 +1199,35 @@ class BatteryDataViewer(QWidget):
                 else:
                     self.data[key].extend(values)
 
-        self.timestamps = self.data.get("time", [])
+        self.timestamps = self.data.get("time", Series(dtype=TIME_DTYPE))
         self.update_checkboxes()
         self.data_label.setText(f"✅ Data loaded from {os.path.basename(file_name)}")
 
     def update_checkboxes(self):
-        # Clear existing checkboxes
-        for i in reversed(range(self.checkbox_layout.count())):
-            widget = self.checkbox_layout.itemAt(i).widget()
-            if widget is not None:
-                widget.setParent(None)
-
-        # Add checkboxes for each data type except time
-        self.checkboxes = {}
-        for key in self.data.keys():
-            if key != "time":
-                checkbox = QCheckBox(key)
-                checkbox.setChecked(True)
-                self.addGlowEffect(checkbox)
-                self.checkbox_layout.addWidget(checkbox)
-                self.checkboxes[key] = checkbox
-
-        if len(self.checkboxes) > 0:
+        # One checkable row per data type except time; rows for keys that
+        # are still in the data keep their checked state
+        keys = [key for key in self.data if key != "time"]
+        if keys != self.param_model.keys:
+            self.param_model.set_keys(keys)
+
+        # Classify each key once instead of on every refresh or plot
+        for key in [key for key in self._kind if key not in self.data]:
+            del self._fmt[key]
+            del self._kind[key]
+            self._plot_keep.pop(key, None)
+        for key in keys:
+            if key not in self._kind:
+                kl = key.lower()
+                kind = next((name for name in VALUE_FORMATS if name in kl), None)
+                self._kind[key] = kind
+                self._fmt[key] = VALUE_FORMATS.get(kind, DEFAULT_VALUE_FORMAT)
+
+        if keys:
             self.data_label.setText("✅ Data loaded. Select parameters to display.")
 
     def get_selected_keys(self):
         """Get the list of selected parameters."""
-        self.selected_keys = [key for key, checkbox in self.checkboxes.items() if checkbox.isChecked()]
+        self.selected_keys = self.param_model.checked_keys()
 
     def show_recent(self):
         """Display the most recent values of selected parameters."""
@@ -680,30 +1241,10 @@ class BatteryDataViewer(QWidget):
             return
 
         # Find the most recent data point for each selected key
-        display_text = "Latest Battery Data:\n"
-        
-        for key in self.selected_keys:
-            if key in self.data and self.data[key]:
-                # Get the most recent value
-                recent_value = self.data[key][-1]
-                
-                # Format the value nicely (handle different data types)
-                if isinstance(recent_value, (int, float)):
-                    # Format value based on measurement type
-                    if "voltage" in key.lower():
-                        display_text += f"{key}: {recent_value:.2f} V\n"
-                    elif "current" in key.lower():
-                        display_text += f"{key}: {recent_value:.2f} A\n"
-                    elif "power" in key.lower():
-                        display_text += f"{key}: {recent_value:.2f} W\n"
-                    elif "life" in key.lower():
-                        display_text += f"{key}: {recent_value:.1f}%\n"
-                    else:
-                        display_text += f"{key}: {recent_value}\n"
-                else:
-                    display_text += f"{key}: {recent_value}\n"
-        
-        self.data_label.setText(display_text)
+        data, fmt = self.data, self._fmt
+        series = ((key, data.get(key)) for key in self.selected_keys)
+        lines = (fmt[key].format(key=key, v=values[-1]) for key, values in series if values)
+        self.data_label.setText("Latest Battery Data:\n" + ''.join(lines))
 
     def plot_data(self):
         self.get_selected_keys()
@@ -715,46 +1256,81 @@ class BatteryDataViewer(QWidget):
             self.data_label.setText("No data available for plotting.")
             return
 
-        plt.figure(figsize=(10, 6))
-        plt.style.use('ggplot')
+        # matplotlib is imported on first use so it does not slow down startup
+        import matplotlib.pyplot as plt
+        
+        # Reuse the plot window while it is open instead of creating a new Figure
+        if self._fig is None or not plt.fignum_exists(self._fig.number):
+            plt.style.use('ggplot')
+            self._fig, self._ax = plt.subplots(figsize=(10, 6))
+            self._lines = {}
+            # Decorations that do not depend on the selection are set up once per window
+            self._ax.set_xlabel("Time (minutes)", fontsize=12)
+            self._ax.set_title("Battery Measurements Over Time", fontsize=14)
+            self._ax.grid(True, alpha=0.3)
+        ax = self._ax
+        # Long series are reduced to about 4 points per pixel column of the figure
+        columns = int(self._fig.get_figwidth() * self._fig.dpi)
+        
+        # The time axis is shared by all series, so build it once
+        times = self.data["time"].array()
+        relative_times = (times - times[0]) * (1 / 60.0)
         
+        shown = []
         for key in self.selected_keys:
             if key in self.data and len(self.data[key]) > 0:
-                if len(self.data["time"]) > 0:
-                    start_time = self.data["time"][0]
-                    relative_times = [(t - start_time) / 60 for t in self.data["time"]]
-                    
-                    # Special handling for battery life data (which typically has only one data point)
-                    if "life" in key.lower() and len(self.data[key]) == 1:
-                        constant_value = self.data[key][0]
-                        plt.plot([relative_times[0]], [constant_value], label=key, marker='o', markersize=8)
+                # Special handling for battery life data (which typically has only one data point)
+                if self._kind[key] == "life" and len(self.data[key]) == 1:
+                    times_to_plot = relative_times[:1]
+                    data_points = self.data[key].array()[:1]
+                    marker, markersize = 'o', 8
+                else:
+                    # Regular data handling for other measurements
+                    # Make sure we use the lesser length between times and data points
+                    # (a new burst replaces the time axis but not the other series)
+                    min_length = min(len(relative_times), len(self.data[key]))
+                    # Series only ever append, so the reduction of the same
+                    # Series, length and width can be reused as it is
+                    series = self.data[key]
+                    cached = self._plot_keep.get(key)
+                    if cached is not None and cached[0] is series and cached[1] == (min_length, columns):
+                        keep = cached[2]
                     else:
-                        # Regular data handling for other measurements
-                        # Make sure we use the lesser length between times and data points
-                        min_length = min(len(relative_times), len(self.data[key]))
-                        data_points = self.data[key][:min_length]
-                        times_to_plot = relative_times[:min_length]
-                        
-                        plt.plot(times_to_plot, data_points, label=key, marker='o', linewidth=2)
-
-        plt.xlabel("Time (minutes)", fontsize=12)
-        
-        if any("voltage" in k.lower() for k in self.selected_keys):
-            plt.ylabel("Voltage (V)", fontsize=12)
-        elif any("current" in k.lower() for k in self.selected_keys):
-            plt.ylabel("Current (A)", fontsize=12)
-        elif any("power" in k.lower() for k in self.selected_keys):
-            plt.ylabel("Power (W)", fontsize=12)
-        elif any("life" in k.lower() for k in self.selected_keys):
-            plt.ylabel("Battery Life (%)", fontsize=12)
-        else:
-            plt.ylabel("Values", fontsize=12)
+                        keep = m4_indices(series.array()[:min_length], columns)
+                        self._plot_keep[key] = (series, (min_length, columns), keep)
+                    times_to_plot = relative_times[:min_length][keep]
+                    data_points = self.data[key].array()[:min_length][keep]
+                    
+                    # Per-point markers are drawn one by one, so skip them on long series
+                    # ('' rather than None, which Line2D.set_marker rejects)
+                    marker = 'o' if min_length < PLOT_MARKER_MAX_POINTS else ''
+                    markersize = plt.rcParams['lines.markersize']
+
+                # Update the existing line for this key rather than adding a new one
+                line = self._lines.get(key)
+                if line is None:
+                    line, = ax.plot(times_to_plot, data_points, label=key, linewidth=2)
+                    self._lines[key] = line
+                else:
+                    line.set_data(times_to_plot, data_points)
+                line.set_marker(marker)
+                line.set_markersize(markersize)
+                shown.append(line)
+
+        for line in self._lines.values():
+            line.set_visible(line in shown)
+        
+        # Label the axis after the highest-priority kind among the selected keys
+        kinds = {self._kind[k] for k in self.selected_keys}
+        ylabel = next((label for kind, label in AXIS_LABELS.items() if kind in kinds), "Values")
+        ax.set_ylabel(ylabel, fontsize=12)
             
-        plt.title("Battery Measurements Over Time", fontsize=14)
-        plt.legend(frameon=True)
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.show()
+        ax.relim(visible_only=True)
+        ax.autoscale_view()
+        ax.legend(handles=shown, frameon=True)
+        self._fig.tight_layout()
+        self._fig.canvas.draw_idle()
+        self._fig.show()
 
     def export_debug_json(self):
         if not self.data or not self.data.get("time"):
@@ -771,31 +1347,55 @@ class BatteryDataViewer(QWidget):
         )
 
         if file_name:
-            try:
-                with open(file_name, 'w') as f:
-                    json.dump(self.data, f, indent=4)
-                QMessageBox.information(self, "Export Successful", f"✅ Data exported to:\n{file_name}")
-            except Exception as e:
-                QMessageBox.critical(self, "Export Failed", f"❌ Failed to export data:\n{str(e)}")
+            # Serialize and write on a worker thread so the UI stays responsive.
+            # Series only ever append, so views of the current samples stay valid.
+            export_data = {key: series.array() for key, series in self.data.items()}
+            self.export_button.setEnabled(False)
+            future = asyncio.get_event_loop().run_in_executor(None, self.write_data_file, file_name, export_data)
+            future.add_done_callback(functools.partial(self.on_data_exported, file_name))
+
+    @staticmethod
+    def write_data_file(file_name, export_data):
+        """Write the exported arrays to a JSON data file (runs on a worker thread)"""
+        if orjson is not None:
+            # orjson serializes the NumPy buffers directly, without tolist()
+            with open(file_name, 'wb') as f:
+                f.write(orjson.dumps(
+                    export_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                ))
+        else:
+            export_data = {key: Series(values, dtype=values.dtype).tolist() for key, values in export_data.items()}
+            # Compact separators; indent makes json.dump much slower on large files
+            with open(file_name, 'w') as f:
+                json.dump(export_data, f, separators=(',', ':'))
+
+    def on_data_exported(self, file_name, future):
+        """Report the result of write_data_file (runs on the UI thread)"""
+        self.export_button.setEnabled(True)
+        try:
+            future.result()
+        except Exception as e:
+            QMessageBox.critical(self, "Export Failed", f"❌ Failed to export data:\n{str(e)}")
+            return
+        QMessageBox.information(self, "Export Successful", f"✅ Data exported to:\n{file_name}")
                 
     def closeEvent(self, event):
         """Clean up when the window is closed"""
-        # Stop Bluetooth worker thread
-        if hasattr(self, 'bluetooth_worker') and self.bluetooth_worker.isRunning():
-            # Stop the event loop
-            if self.bluetooth_worker.loop:
-                self.bluetooth_worker.loop.call_soon_threadsafe(
-                    self.bluetooth_worker.loop.stop
-                )
-                
-            # Wait for thread to finish
-            self.bluetooth_worker.wait()
+        # Stop the Bluetooth tasks
+        if hasattr(self, 'bluetooth_worker'):
+            self.bluetooth_worker.stop()
             
         super().closeEvent(event)
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    
+    # Run asyncio on the Qt event loop so BLE callbacks execute on the UI thread
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    
     viewer = BatteryDataViewer()
     viewer.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    with loop:
+        loop.run_forever()
\ No newline at end of file